@@ -1,19 +1,37 @@
 #!/usr/bin/env python3
+# pragma pylint: disable=too-many-lines
 
 import argparse
 import fnmatch
 import json
+import operator
 import os
+import queue
+import re
+import shutil
 import subprocess
 import sys
+import threading
 import traceback
 
-from typing import Any, List, Optional, Tuple, Union
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple, Union
 
-import colorama # Enables the use of SGR & CUP terminal VT sequences on Windows.
-from deepdiff import DeepDiff
+try:
+    import orjson # Optional, considerably faster (de)serialization of big messages.
+except ImportError:
+    orjson = None
 
 # {{{ JsonRpcProcess
+def json_encode(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj) # pragma pylint: disable=no-member
+    return json.dumps(obj).encode("utf-8")
+
+def json_decode(data: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(data) # pragma pylint: disable=no-member
+    return json.loads(data)
+
 class BadHeader(Exception):
     def __init__(self, msg: str):
         super().__init__("Bad header: " + msg)
@@ -23,49 +41,93 @@ class JsonRpcProcess:
     exe_args: List[str]
     process: subprocess.Popen
     trace_io: bool
+    initialized: bool
+    opened_uris: Set[str]
+    reader: threading.Thread
+    _stdin_fd: int
 
     def __init__(self, exe_path: str, exe_args: List[str], trace_io: bool = True):
         self.exe_path = exe_path
         self.exe_args = exe_args
         self.trace_io = trace_io
+        # Bytes read from the server's stdout that have not been consumed as a message yet.
+        self._rbuf = bytearray()
+        # Message bodies received by the reader thread, followed by None once the server quit
+        # or by the exception that stopped the reader.
+        self._messages: queue.Queue = queue.Queue()
+        # Notifications to be sent along with the next message(s) written to the server.
+        self._deferred: List[Tuple[str, Optional[dict]]] = []
+        # LSP session state, needed to hand the server on from one test case to the next.
+        self.initialized = False
+        self.opened_uris = set()
 
     def __enter__(self):
-        self.process = subprocess.Popen(
+        self.start()
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        self.process = subprocess.Popen( # pragma pylint: disable=consider-using-with
             [self.exe_path, *self.exe_args],
             stdin=subprocess.PIPE,
             stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE
+            # Nothing reads the server's stderr, so a pipe would eventually fill up and block the server.
+            stderr=subprocess.DEVNULL,
+            # Python's own descriptors are not inheritable anyway, and not having
+            # to close all others keeps spawning the server cheap.
+            close_fds=False
         )
-        return self
-
-    def __exit__(self, exception_type, exception_value, traceback) -> None:
+        # Messages are written straight to the pipe, bypassing the (immediately flushed) write buffer.
+        self._stdin_fd = self.process.stdin.fileno()
+        # Messages are received on a separate thread, so that reading the server's
+        # next message overlaps with processing the previous one.
+        self.reader = threading.Thread(target=self._read_messages, daemon=True)
+        self.reader.start()
+
+    def stop(self) -> None:
         self.process.kill()
         self.process.wait(timeout=2.0)
 
-    def trace(self, topic: str, message: str) -> None:
+    def trace(self, topic: str, message_fn: Callable[[], str]) -> None:
+        """
+        Prints the message returned by `message_fn`.
+        The message is only formatted if I/O tracing is enabled.
+        """
         if self.trace_io:
-            print(f"{SGR_TRACE}{topic}:{SGR_RESET} {message}")
+            print(f"{SGR_TRACE}{topic}:{SGR_RESET} {message_fn()}")
 
-    def receive_message(self) -> Union[None, dict]:
-        # Note, we should make use of timeout to avoid infinite blocking if nothing is received.
-        CONTENT_LENGTH_HEADER = "Content-Length: "
-        CONTENT_TYPE_HEADER = "Content-Type: "
-        if self.process.stdout is None:
-            return None
-        message_size = None
-        while True:
-            # read header
-            line = self.process.stdout.readline()
-            if line == '':
+    def _read_chunk(self) -> bool:
+        """
+        Appends whatever the server has written so far (up to 64 KiB) to the receive buffer.
+        Returns False if the server closed its stdout.
+        """
+        chunk = self.process.stdout.read1(65536)
+        if not chunk:
+            return False
+        self._rbuf += chunk
+        return True
+
+    def _read_message_body(self) -> Optional[bytes]:
+        """
+        Reads the next message from the server and returns its (still encoded) body.
+        Returns None if the server quit.
+        """
+        # Headers are plain ASCII and are parsed as bytes, without decoding them first.
+        CONTENT_LENGTH_HEADER = b"Content-Length: "
+        CONTENT_TYPE_HEADER = b"Content-Type: "
+        # read header
+        header_end = self._rbuf.find(b"\r\n\r\n")
+        while header_end == -1:
+            # The terminator may straddle the old and the newly read bytes.
+            search_start = max(len(self._rbuf) - 3, 0)
+            if not self._read_chunk():
                 # server quit
                 return None
-            line = line.decode("utf-8")
-            if not line.endswith("\r\n"):
-                raise BadHeader("missing newline")
-            # remove the "\r\n"
-            line = line[:-2]
-            if line == '':
-                break # done with the headers
+            header_end = self._rbuf.find(b"\r\n\r\n", search_start)
+        message_size = None
+        for line in self._rbuf[:header_end].split(b"\r\n"):
             if line.startswith(CONTENT_LENGTH_HEADER):
                 line = line[len(CONTENT_LENGTH_HEADER):]
                 if not line.isdigit():
@@ -78,24 +140,100 @@ class JsonRpcProcess:
                 raise BadHeader("unknown header")
         if message_size is None:
             raise BadHeader("missing size")
-        rpc_message = self.process.stdout.read(message_size).decode("utf-8")
-        json_object = json.loads(rpc_message)
-        self.trace('receive_message', json.dumps(json_object, indent=4, sort_keys=True))
+        # read body
+        body_start = header_end + 4
+        body_end = body_start + message_size
+        while len(self._rbuf) < body_end:
+            if not self._read_chunk():
+                # server quit
+                return None
+        # Copy the body out via a memoryview, which unlike slicing the bytearray takes only one copy.
+        # The view has to be released before the buffer can be resized.
+        with memoryview(self._rbuf) as rbuf_view:
+            rpc_message = bytes(rbuf_view[body_start:body_end])
+        del self._rbuf[:body_end]
+        return rpc_message
+
+    def _read_messages(self) -> None:
+        """
+        Reader thread: Queues the bodies of all messages received from the server.
+        """
+        try:
+            rpc_message = self._read_message_body() if self.process.stdout is not None else None
+            while rpc_message is not None:
+                self._messages.put(rpc_message)
+                rpc_message = self._read_message_body()
+            self._messages.put(None)
+        except Exception as e: # pragma pylint: disable=broad-except
+            self._messages.put(e)
+
+    def receive_message(self) -> Union[None, dict]:
+        # Note, we should make use of timeout to avoid infinite blocking if nothing is received.
+        if self._deferred:
+            self.send_messages([])
+        rpc_message = self._messages.get()
+        if rpc_message is None or isinstance(rpc_message, Exception):
+            # The reader thread has stopped, so this stays the outcome of all further calls.
+            self._messages.put(rpc_message)
+            if rpc_message is not None:
+                raise rpc_message
+            # server quit
+            return None
+        json_object = json_decode(rpc_message)
+        self.trace('receive_message', lambda: json.dumps(json_object, indent=4, sort_keys=True))
         return json_object
 
-    def send_message(self, method_name: str, params: Optional[dict]) -> None:
-        if self.process.stdin is None:
-            return
+    def encode_message(self, method_name: str, params: Optional[dict], request_id: Optional[str] = None) -> bytearray:
         message = {
             'jsonrpc': '2.0',
             'method': method_name,
             'params': params
         }
-        json_string = json.dumps(obj=message)
-        rpc_message = f"Content-Length: {len(json_string)}\r\n\r\n{json_string}"
-        self.trace(f'send_message ({method_name})', json.dumps(message, indent=4, sort_keys=True))
-        self.process.stdin.write(rpc_message.encode("utf-8"))
-        self.process.stdin.flush()
+        if request_id is not None:
+            message['id'] = request_id
+        if method_name == 'textDocument/didOpen':
+            self.opened_uris.add(params['textDocument']['uri'])
+        elif method_name == 'textDocument/didClose':
+            self.opened_uris.discard(params['textDocument']['uri'])
+        body = json_encode(message)
+        self.trace(f'send_message ({method_name})', lambda: json.dumps(message, indent=4, sort_keys=True))
+        rpc_message = bytearray(b"Content-Length: ")
+        rpc_message += str(len(body)).encode("ascii")
+        rpc_message += b"\r\n\r\n"
+        rpc_message += body
+        return rpc_message
+
+    def send_messages(self, messages: List[Tuple[str, Optional[dict]]], request_id: Optional[str] = None) -> None:
+        """
+        Sends the given (method name, params) pairs, preceded by any deferred notifications.
+        If `request_id` is given, the last message is sent as a request with that id.
+        All messages are assembled into one buffer, so that they go out in a single write.
+        """
+        if self.process.stdin is None:
+            return
+        rpc_messages = bytearray()
+        all_messages = self._deferred + messages
+        for i, (method_name, params) in enumerate(all_messages):
+            rpc_messages += self.encode_message(
+                method_name,
+                params,
+                request_id if i == len(all_messages) - 1 else None
+            )
+        self._deferred.clear()
+        remaining = memoryview(rpc_messages)
+        while remaining:
+            # A write to a pipe may be partial.
+            remaining = remaining[os.write(self._stdin_fd, remaining):]
+
+    def send_message(self, method_name: str, params: Optional[dict]) -> None:
+        self.send_messages([(method_name, params)])
+
+    def defer_notification(self, name: str, params: Optional[dict] = None) -> None:
+        """
+        Queues a notification to be written together with the next message sent,
+        or at the latest before waiting for a message from the server.
+        """
+        self._deferred.append((name, params))
 
     def call_method(self, method_name: str, params: Optional[dict]) -> Any:
         self.send_message(method_name, params)
@@ -106,22 +244,67 @@ class JsonRpcProcess:
 
 # }}}
 
-SGR_RESET = '\033[m'
-SGR_TRACE = '\033[1;36m'
-SGR_NOTICE = '\033[1;35m'
-SGR_TEST_BEGIN = '\033[1;33m'
-SGR_ASSERT_BEGIN = '\033[1;34m'
-SGR_STATUS_OKAY = '\033[1;32m'
-SGR_STATUS_FAIL = '\033[1;31m'
+if sys.stdout.isatty():
+    SGR_RESET = '\033[m'
+    SGR_TRACE = '\033[1;36m'
+    SGR_NOTICE = '\033[1;35m'
+    SGR_TEST_BEGIN = '\033[1;33m'
+    SGR_ASSERT_BEGIN = '\033[1;34m'
+    SGR_STATUS_OKAY = '\033[1;32m'
+    SGR_STATUS_FAIL = '\033[1;31m'
+else:
+    # No terminal escape sequences when the output is redirected, e.g. into a log file.
+    SGR_RESET = ''
+    SGR_TRACE = ''
+    SGR_NOTICE = ''
+    SGR_TEST_BEGIN = ''
+    SGR_ASSERT_BEGIN = ''
+    SGR_STATUS_OKAY = ''
+    SGR_STATUS_FAIL = ''
+
+# Id of the request used to find the end of the server's replies when resetting it.
+SYNC_REQUEST_ID = 'lspTestSuiteSync'
+
+class Missing:
+    """
+    Placeholder for a dict key or list element that only one of two compared values has.
+    """
+    def __repr__(self) -> str:
+        return "<missing>"
+
+MISSING = Missing()
+
+def diff_values(actual: Any, expected: Any, path: str = "root") -> Iterator[Tuple[str, Any, Any]]:
+    """
+    Yields a (path, actual, expected) triple for every place in which the given
+    JSON-like values differ, descending into dicts and lists present on both sides.
+    """
+    if isinstance(actual, dict) and isinstance(expected, dict):
+        for key in sorted(actual.keys() | expected.keys(), key=str):
+            yield from diff_values(actual.get(key, MISSING), expected.get(key, MISSING), f"{path}[{key!r}]")
+    elif isinstance(actual, list) and isinstance(expected, list):
+        for i in range(max(len(actual), len(expected))):
+            yield from diff_values(
+                actual[i] if i < len(actual) else MISSING,
+                expected[i] if i < len(expected) else MISSING,
+                f"{path}[{i}]"
+            )
+    elif actual != expected:
+        yield path, actual, expected
 
 class ExpectationFailed(Exception):
     def __init__(self, actual, expected):
         self.actual = actual
         self.expected = expected
-        diff = DeepDiff(actual, expected)
-        super().__init__(
-            f"Expectation failed.\n\tExpected {expected}\n\tbut got {actual}.\n\t{diff}"
+        super().__init__(actual, expected)
+
+    def __str__(self) -> str:
+        # The diff is only computed once the failure actually gets reported.
+        diff = "\n\t".join(
+            f"{path}: expected {expected!r} but got {actual!r}"
+            for path, actual, expected in diff_values(self.actual, self.expected)
         )
+        return f"Expectation failed.\n\tExpected {self.expected}\n\tbut got {self.actual}.\n\t{diff}"
 
 def create_cli_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description="Solidity LSP Test suite")
@@ -147,6 +330,13 @@ def create_cli_parser() -> argparse.ArgumentParser:
         help="Filters all available tests by matching against this test pattern (using globbing)",
         nargs="?"
     )
+    parser.set_defaults(reuse_server=False)
+    parser.add_argument(
+        "-r", "--reuse-server",
+        dest="reuse_server",
+        action="store_true",
+        help="Run all test cases against a single solc process instead of starting a new one for each test case."
+    )
     parser.add_argument(
         "solc_path",
         type=str,
@@ -173,17 +363,35 @@ class SolidityLSPTestSuite: # {{{
     assertion_counter = Counter()
     print_assertions: bool = False
     trace_io: bool = False
+    reuse_server: bool = False
     test_pattern: str
+    test_pattern_regex: re.Pattern
+    # Test cases initializing the server differently, which therefore cannot share it with other test cases.
+    tests_requiring_fresh_server = {
+        'textDocument_didOpen_with_relative_import_without_project_url',
+    }
 
     def __init__(self):
-        colorama.init()
+        if sys.platform == "win32":
+            # Enables the use of SGR & CUP terminal VT sequences on Windows.
+            import colorama # pragma pylint: disable=import-outside-toplevel
+            colorama.init()
         args = create_cli_parser().parse_args()
-        self.solc_path = args.solc_path
+        # Resolved once up front, so that starting a server does not involve a PATH lookup.
+        solc_path = shutil.which(args.solc_path)
+        self.solc_path = os.path.realpath(solc_path) if solc_path is not None else args.solc_path
         self.project_root_dir = os.path.realpath(args.project_root_dir) + "/test/libsolidity/lsp"
         self.project_root_uri = "file://" + self.project_root_dir
         self.print_assertions = args.print_assertions
         self.trace_io = args.trace_io
+        self.reuse_server = args.reuse_server
         self.test_pattern = args.test_pattern
+        self.test_pattern_regex = re.compile(fnmatch.translate(self.test_pattern))
+        # Test file contents by test case name, so that every file is read from disk only once.
+        self._file_cache: Dict[str, str] = {}
+        # Test file paths and URIs by test case name.
+        self._path_cache: Dict[str, str] = {}
+        self._uri_cache: Dict[str, str] = {}
 
         print(f"{SGR_NOTICE}test pattern: {self.test_pattern}{SGR_RESET}")
 
@@ -192,28 +400,48 @@ class SolidityLSPTestSuite: # {{{
         Runs all test cases.
         Returns 0 on success and the number of failing assertions (capped to 127) otherwise.
         """
-        all_tests = sorted([
-            str(name)[5:]
-            for name in dir(SolidityLSPTestSuite)
-            if callable(getattr(SolidityLSPTestSuite, name)) and name.startswith("test_")
-        ])
-        filtered_tests = fnmatch.filter(all_tests, self.test_pattern)
-        for method_name in filtered_tests:
-            test_fn = getattr(self, 'test_' + method_name)
-            title: str = test_fn.__name__[5:]
+        all_tests = {
+            name[5:]: fn
+            for name, fn in vars(SolidityLSPTestSuite).items()
+            if name.startswith("test_") and callable(fn)
+        }
+        filtered_tests = [title for title in sorted(all_tests) if self.test_pattern_regex.match(title)]
+        shared_solc: Optional[JsonRpcProcess] = None
+        passed = 0
+        failed = 0
+        for title in filtered_tests:
+            test_fn = all_tests[title]
             print(f"{SGR_TEST_BEGIN}Testing {title} ...{SGR_RESET}")
+            reusing_server = self.reuse_server and title not in self.tests_requiring_fresh_server
             try:
-                with JsonRpcProcess(self.solc_path, ["--lsp"], trace_io=self.trace_io) as solc:
-                    test_fn(solc)
-                    self.test_counter.passed += 1
+                if reusing_server:
+                    if shared_solc is None:
+                        shared_solc = JsonRpcProcess(self.solc_path, ["--lsp"], trace_io=self.trace_io)
+                        shared_solc.start()
+                    test_fn(self, shared_solc)
+                    self.reset_lsp(shared_solc)
+                    passed += 1
+                else:
+                    with JsonRpcProcess(self.solc_path, ["--lsp"], trace_io=self.trace_io) as solc:
+                        test_fn(self, solc)
+                        passed += 1
+                continue
             except ExpectationFailed as e:
-                self.test_counter.failed += 1
+                failed += 1
                 print(e)
                 print(traceback.format_exc())
             except Exception as e: # pragma pylint: disable=broad-except
-                self.test_counter.failed += 1
+                failed += 1
                 print(f"Unhandled exception {e.__class__.__name__} caught: {e}")
                 print(traceback.format_exc())
+            if reusing_server and shared_solc is not None:
+                # The server's state is unknown after a failing test case, so do not pass it on.
+                shared_solc.stop()
+                shared_solc = None
+        if shared_solc is not None:
+            shared_solc.stop()
+        self.test_counter.passed += passed
+        self.test_counter.failed += failed
 
         print(
             f"\n{SGR_NOTICE}Summary:{SGR_RESET}\n\n"
@@ -228,6 +456,9 @@ class SolidityLSPTestSuite: # {{{
         Prepares the solc LSP server by calling `initialize`,
         and `initialized` methods.
         """
+        if lsp.initialized:
+            # A server shared between test cases has been set up by an earlier test case already.
+            return
         params = {
             'processId': None,
             'rootUri': self.project_root_uri,
@@ -249,25 +480,59 @@ class SolidityLSPTestSuite: # {{{
         if not expose_project_root:
             params['rootUri'] = None
         lsp.call_method('initialize', params)
-        lsp.send_notification('initialized')
+        # Goes out together with the test case's first message, e.g. the initial didOpen.
+        lsp.defer_notification('initialized')
+        lsp.initialized = True
+
+    def reset_lsp(self, lsp: JsonRpcProcess) -> None:
+        """
+        Closes all files a test case left open on the server and drops
+        the resulting notifications, so that the server can be reused
+        by the next test case.
+        """
+        # solc handles messages strictly in order, and has to answer the trailing request
+        # (with an error, as it does not know the method). Once that reply arrived,
+        # all notifications caused by closing the files have been received.
+        lsp.send_messages(
+            [
+                *(('textDocument/didClose', {'textDocument': {'uri': uri}}) for uri in sorted(lsp.opened_uris)),
+                ('solidity/lspTestSuiteSync', None),
+            ],
+            request_id=SYNC_REQUEST_ID
+        )
+        while True:
+            message = lsp.receive_message()
+            if message is None:
+                raise RuntimeError("Server quit while being reset.")
+            if message.get('id') == SYNC_REQUEST_ID:
+                return
 
     # {{{ helpers
     def get_test_file_path(self, test_case_name):
-        return f"{self.project_root_dir}/{test_case_name}.sol"
+        path = self._path_cache.get(test_case_name)
+        if path is None:
+            path = self._path_cache[test_case_name] = f"{self.project_root_dir}/{test_case_name}.sol"
+        return path
 
     def get_test_file_uri(self, test_case_name):
-        return "file://" + self.get_test_file_path(test_case_name)
+        uri = self._uri_cache.get(test_case_name)
+        if uri is None:
+            uri = self._uri_cache[test_case_name] = "file://" + self.get_test_file_path(test_case_name)
+        return uri
 
     def get_test_file_contents(self, test_case_name):
         """
         Reads the file contents from disc for a given test case.
         The `test_case_name` will be the basename of the file
         in the test path (test/libsolidity/lsp).
+        The contents are cached, so subsequent calls do not touch the disk again.
         """
-        with open(self.get_test_file_path(test_case_name), mode="r", encoding="utf-8", newline='') as f:
-            return f.read()
+        if test_case_name not in self._file_cache:
+            with open(self.get_test_file_path(test_case_name), mode="rb") as f:
+                self._file_cache[test_case_name] = f.read().decode("utf-8")
+        return self._file_cache[test_case_name]
 
-    def require_params_for_method(self, method_name: str, message: dict) -> Any:
+    def require_params_for_method(self, method_name: str, message: Optional[dict]) -> Any:
         """
         Ensures the given RPC message does contain the
         field 'method' with the given method name,
@@ -275,30 +540,30 @@ class SolidityLSPTestSuite: # {{{
         An exception is raised on expectation failures.
         """
         assert message is not None
-        if 'error' in message.keys():
-            code = message['error']["code"]
-            text = message['error']['message']
+        error = message.get('error')
+        if error is not None:
+            code = error["code"]
+            text = error['message']
             raise RuntimeError(f"Error {code} received. {text}")
-        if 'method' not in message.keys():
+        received_method_name = message.get('method')
+        if received_method_name is None:
             raise RuntimeError("No method received but something else.")
-        self.expect_equal(message['method'], method_name, "Ensure expected method name")
+        if received_method_name != method_name:
+            raise RuntimeError(f"Expected method {method_name} but received {received_method_name}.")
         return message['params']
 
     def wait_for_diagnostics(self, solc: JsonRpcProcess, count: int) -> List[dict]:
         """
         Return `count` number of published diagnostic reports sorted by file URI.
         """
-        reports = []
-        for _ in range(0, count):
-            message = solc.receive_message()
-            assert message is not None # This can happen if the server aborts early.
-            reports.append(
-                self.require_params_for_method(
-                    'textDocument/publishDiagnostics',
-                    message,
-                )
-            )
-        return sorted(reports, key=lambda x: x['uri'])
+        # Note, require_params_for_method() asserts on a missing message,
+        # which can happen if the server aborts early.
+        reports = [
+            self.require_params_for_method('textDocument/publishDiagnostics', solc.receive_message())
+            for _ in range(count)
+        ]
+        reports.sort(key=operator.itemgetter('uri'))
+        return reports
 
     def open_file_and_wait_for_diagnostics(
         self,
@@ -327,8 +592,7 @@ class SolidityLSPTestSuite: # {{{
     def expect_equal(self, actual, expected, description="Equality") -> None:
         self.assertion_counter.total += 1
         prefix = f"[{self.assertion_counter.total}] {SGR_ASSERT_BEGIN}{description}: "
-        diff = DeepDiff(actual, expected)
-        if len(diff) == 0:
+        if actual == expected:
             self.assertion_counter.passed += 1
             if self.print_assertions:
                 print(prefix + SGR_STATUS_OKAY + 'OK' + SGR_RESET)
@@ -352,14 +616,12 @@ class SolidityLSPTestSuite: # {{{
     ):
         assert len(startEndColumns) == 2
         [startColumn, endColumn] = startEndColumns
-        self.expect_equal(diagnostic['code'], code, f'diagnostic: {code}')
+        self.expect_equal(diagnostic.get('code'), code, f'diagnostic: {code}')
+        start, end = diagnostic['range']['start'], diagnostic['range']['end']
         self.expect_equal(
-            diagnostic['range'],
-            {
-                'start': {'character': startColumn, 'line': lineNo},
-                'end': {'character': endColumn, 'line': lineNo}
-            },
-            "diagnostic: check range"
+            (start['line'], start['character'], end['line'], end['character']),
+            (lineNo, startColumn, lineNo, endColumn),
+            "diagnostic: check range (start line, start column, end line, end column)"
         )
     # }}}
 
@@ -439,6 +701,7 @@ class SolidityLSPTestSuite: # {{{
     def test_didChange_in_A_causing_error_in_B(self, solc: JsonRpcProcess) -> None:
         # Reusing another test but now change some file that generates an error in the other.
         self.test_textDocument_didOpen_with_relative_import(solc)
+        # Being imported does not make lib.sol an open file, and solc drops changes to files that are not open.
         self.open_file_and_wait_for_diagnostics(solc, 'lib', 2)
         solc.send_message(
             'textDocument/didChange',
@@ -658,7 +921,7 @@ class SolidityLSPTestSuite: # {{{
         """
 
         self.setup_lsp(solc)
-        FILE_A_URI = f'file://{self.project_root_dir}/a.sol'
+        FILE_A_URI = self.get_test_file_uri('a')
         solc.send_message('textDocument/didOpen', {
             'textDocument': {
                 'uri': FILE_A_URI,
@@ -682,7 +945,7 @@ class SolidityLSPTestSuite: # {{{
         )
         reports = self.wait_for_diagnostics(solc, 1)
         self.expect_equal(len(reports), 1, '')
-        self.expect_equal(reports[0]['uri'], f'file://{self.project_root_dir}/lib.sol', "")
+        self.expect_equal(reports[0]['uri'], self.get_test_file_uri('lib'), "")
         self.expect_equal(len(reports[0]['diagnostics']), 0, "should not contain diagnostics")
 
 